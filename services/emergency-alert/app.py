@@ -5,23 +5,49 @@ Displays active alerts in a web UI and exposes REST API endpoints.
 """
 
 import os
-import json
+import time
+import queue
+import asyncio
 import logging
+import orjson
+import requests
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime
-from collections import deque
+import itertools
+from collections import deque, OrderedDict
 from typing import Dict, List, Optional
-from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import FileResponse, ORJSONResponse
+from sse_starlette.sse import EventSourceResponse
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging. Handlers only enqueue records; a background thread does
+# the actual stream writes, so stdout backpressure (e.g. a paused container
+# log shipper) can't block the event loop mid-request.
+_log_queue: queue.Queue = queue.Queue(-1)
+_log_listener = QueueListener(_log_queue, logging.StreamHandler())
+_log_listener.start()
+logging.basicConfig(level=logging.INFO, handlers=[QueueHandler(_log_queue)])
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+# orjson-backed responses skip jsonable_encoder and the stdlib json
+# serializer for every dict-returning endpoint
+app = FastAPI(default_response_class=ORJSONResponse)
 
 PORT = int(os.getenv("PORT", "3005"))
 
+# Dapr configuration for persisting alerts to the state store (Redis)
+DAPR_HTTP_PORT = int(os.getenv("DAPR_HTTP_PORT", "3505"))
+STATESTORE_NAME = "statestore"
+ALERT_STATE_TTL_SECONDS = int(os.getenv("ALERT_STATE_TTL_SECONDS", "3600"))
+
+# Key holding the list of active alert ids; the Dapr state API has no
+# scan, so this index is what makes the persisted alerts enumerable on
+# startup
+ALERT_INDEX_KEY = "alertindex"
+
+# Directory holding the prebuilt web UI
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
 # Emergency squawk codes
 EMERGENCY_SQUAWK_CODES = {
     "7700": "General Emergency",
@@ -29,38 +55,261 @@ EMERGENCY_SQUAWK_CODES = {
     "7600": "Radio Communication Failure"
 }
 
+# Fast-path membership set (string and int forms) so the 99.99% non-emergency
+# case is a single hash lookup with no string coercion
+EMERGENCY_SQUAWK_SET = frozenset(EMERGENCY_SQUAWK_CODES) | frozenset(
+    int(code) for code in EMERGENCY_SQUAWK_CODES
+)
+
 # Store active alerts (in-memory, can be persisted to state store if needed)
 # Format: {alert_id: {flight_data, timestamp, squawk_code, description}}
-active_alerts: Dict[str, dict] = {}
+# Bounded with FIFO eviction so a squawk storm can't bloat memory or the
+# serialization cost of the active-alerts endpoint
+MAX_ACTIVE_ALERTS = int(os.getenv("MAX_ACTIVE_ALERTS", "500"))
+active_alerts: "OrderedDict[str, dict]" = OrderedDict()
+
+def store_alert(alert_id: str, alert_record: dict):
+    """Insert an active alert, evicting the oldest one past the cap."""
+    active_alerts[alert_id] = alert_record
+    active_alerts.move_to_end(alert_id)
+    if len(active_alerts) > MAX_ACTIVE_ALERTS:
+        active_alerts.popitem(last=False)
+
+# Keep-alive session to the Dapr sidecar for state store writes
+_state_session = requests.Session()
+
+def _state_entry(key: str, value) -> dict:
+    """Build one entry for the Dapr bulk state-save payload."""
+    return {
+        "key": key,
+        "value": value,
+        "metadata": {"ttlInSeconds": str(ALERT_STATE_TTL_SECONDS)}
+    }
+
+def _post_state_entries(entries: List[dict]):
+    """POST a batch of entries to the Dapr state API (blocking; run off-loop)."""
+    _state_session.post(
+        f"http://localhost:{DAPR_HTTP_PORT}/v1.0/state/{STATESTORE_NAME}",
+        data=orjson.dumps(entries),
+        headers={"Content-Type": "application/json"},
+        timeout=5
+    )
+
+def _save_alerts_to_state(records: List[dict], alert_ids: List[str]):
+    """Persist alert records plus the id index (blocking; run off-loop)."""
+    try:
+        entries = [_state_entry(record["alert_id"], record) for record in records]
+        entries.append(_state_entry(ALERT_INDEX_KEY, alert_ids))
+        _post_state_entries(entries)
+    except Exception as e:
+        logger.error(f"Error saving alerts to state store: {e}")
+
+def _save_alert_index(alert_ids: List[str]):
+    """Rewrite the persisted alert id index (blocking; run off-loop)."""
+    try:
+        _post_state_entries([_state_entry(ALERT_INDEX_KEY, alert_ids)])
+    except Exception as e:
+        logger.error(f"Error saving alert index to state store: {e}")
+
+def _load_alerts_from_state() -> List[dict]:
+    """
+    Read the persisted alerts back on startup (blocking; run off-loop):
+    fetch the id index, then bulk-get the surviving records. Returns []
+    when there is nothing persisted or the sidecar is unreachable.
+    """
+    try:
+        response = _state_session.get(
+            f"http://localhost:{DAPR_HTTP_PORT}/v1.0/state/{STATESTORE_NAME}/{ALERT_INDEX_KEY}",
+            timeout=5
+        )
+        if response.status_code != 200 or not response.content:
+            return []
+        alert_ids = orjson.loads(response.content)
+        if not alert_ids:
+            return []
+        bulk = _state_session.post(
+            f"http://localhost:{DAPR_HTTP_PORT}/v1.0/state/{STATESTORE_NAME}/bulk",
+            data=orjson.dumps({"keys": alert_ids, "parallelism": 10}),
+            headers={"Content-Type": "application/json"},
+            timeout=5
+        )
+        if bulk.status_code != 200:
+            return []
+        # Entries whose TTL already expired come back without data
+        return [item["data"] for item in orjson.loads(bulk.content) if item.get("data")]
+    except Exception as e:
+        logger.error(f"Error loading alerts from state store: {e}")
+        return []
+
+def _delete_alert_from_state(alert_id: str):
+    """Remove a cleared alert from the state store (blocking; run off-loop)."""
+    try:
+        _state_session.delete(
+            f"http://localhost:{DAPR_HTTP_PORT}/v1.0/state/{STATESTORE_NAME}/{alert_id}",
+            timeout=5
+        )
+    except Exception as e:
+        logger.error(f"Error deleting alert from state store: {e}")
 
-# Store alert history (last 100 alerts)
-alert_history: deque = deque(maxlen=100)
+def persist_alerts(records: List[dict]):
+    """Fire-and-forget state store write so ingest never waits on Redis."""
+    asyncio.create_task(
+        asyncio.to_thread(_save_alerts_to_state, records, list(active_alerts)))
+
+# Alert history as a single-writer ring buffer. Slot stores and the head
+# update are plain pointer/int writes, which stay atomic under the GIL and
+# under free-threaded Python's per-object locking, so producers never take a
+# lock and readers just snapshot the head and walk backwards.
+HISTORY_SIZE = 128  # power of two so indices wrap with a mask
+_history_slots: List[Optional[dict]] = [None] * HISTORY_SIZE
+_history_index = itertools.count()
+_history_head = 0  # total records ever written; next(_history_index) + 1
+
+def append_history(alert_record: dict):
+    """Append an alert record to the history ring buffer."""
+    global _history_head
+    i = next(_history_index)  # atomic even with concurrent producers
+    _history_slots[i & (HISTORY_SIZE - 1)] = alert_record
+    _history_head = i + 1
+
+def history_snapshot(limit: int) -> List[dict]:
+    """Return up to `limit` most recent alert records, newest first."""
+    head = _history_head
+    count = min(limit, head, HISTORY_SIZE)
+    mask = HISTORY_SIZE - 1
+    return [_history_slots[(head - 1 - k) & mask] for k in range(count)]
+
+# Long-horizon alert counts in exponentially coarser time buckets: per-minute
+# for the last hour, per-hour for the last day, per-day for the last month.
+# Keeps O(log T) memory for arbitrary retention while the 128-slot ring above
+# holds the full records for recent alerts.
+_minute_counts: deque = deque(maxlen=60)
+_hour_counts: deque = deque(maxlen=24)
+_day_counts: deque = deque(maxlen=30)
+_current_minute_count = 0
+
+def count_alert(n: int = 1):
+    """Record n new alerts in the current minute bucket."""
+    global _current_minute_count
+    _current_minute_count += n
+
+async def _roll_buckets():
+    """Roll the current minute count into coarser buckets once a minute."""
+    global _current_minute_count
+    minutes = 0
+    while True:
+        await asyncio.sleep(60)
+        _minute_counts.append(_current_minute_count)
+        _current_minute_count = 0
+        minutes += 1
+        if minutes % 60 == 0:
+            # The minute deque now holds exactly the last hour
+            _hour_counts.append(sum(_minute_counts))
+        if minutes % (60 * 24) == 0:
+            _day_counts.append(sum(_hour_counts))
 
 # Lock for thread safety (if needed)
 alerts_lock = False
 
-def get_alert_id(flight_data: dict) -> str:
-    """Generate unique alert ID from flight data."""
-    icao24 = flight_data.get('icao24', 'unknown')
-    timestamp = datetime.utcnow().isoformat()
-    return f"{icao24}-{timestamp}"
-
-def check_emergency_squawk(flight_data: dict) -> Optional[str]:
-    """Check if flight has an emergency squawk code."""
-    squawk = flight_data.get('squawk')
-    if not squawk:
-        return None
-    
-    squawk_str = str(squawk).strip()
-    if squawk_str in EMERGENCY_SQUAWK_CODES:
-        return squawk_str
-    
-    return None
+# One wake-up event per connected SSE stream; signaled on every mutation
+# of active_alerts so browsers get pushed updates instead of polling
+_stream_subscribers: set = set()
+
+# Pre-serialized active-alerts payload, rebuilt lazily after a mutation so
+# steady-state polls return cached bytes instead of re-encoding the dict
+_snapshot_bytes: bytes = b'{"alerts":{},"count":0}'
+_snapshot_dirty = True
+
+# Monotonic version of the alert set, served as the ETag so unchanged
+# polls can be answered with an empty 304
+_alerts_version = 0
+
+def notify_alerts_changed():
+    """Invalidate the cached snapshot and wake all connected alert streams."""
+    global _snapshot_dirty, _alerts_version
+    _snapshot_dirty = True
+    _alerts_version += 1
+    for event in _stream_subscribers:
+        event.set()
+
+# Payloads above this size are decoded on the default thread pool so the
+# event loop keeps servicing UI polls while the parse runs
+JSON_OFFLOAD_THRESHOLD = int(os.getenv("JSON_OFFLOAD_THRESHOLD", str(64 * 1024)))
+
+async def parse_json_payload(raw):
+    """Decode a JSON payload, offloading large bodies to the thread pool."""
+    if len(raw) < JSON_OFFLOAD_THRESHOLD:
+        return orjson.loads(raw)
+    return await asyncio.to_thread(orjson.loads, raw)
+
+# ISO timestamp cached at one-second resolution so the hot path does a
+# plain global read instead of a datetime allocation + format per message
+_iso_now = datetime.utcnow().isoformat() + "Z"
+
+async def _refresh_timestamp():
+    """Refresh the cached ISO timestamp once per second."""
+    global _iso_now
+    while True:
+        _iso_now = datetime.utcnow().isoformat() + "Z"
+        await asyncio.sleep(1)
+
+@app.on_event("startup")
+async def startup():
+    """Restore persisted alerts and start background tasks."""
+    for record in await asyncio.to_thread(_load_alerts_from_state):
+        store_alert(record["alert_id"], record)
+    if active_alerts:
+        logger.info(f"Restored {len(active_alerts)} active alerts from state store")
+        notify_alerts_changed()
+    asyncio.create_task(_refresh_timestamp())
+    asyncio.create_task(_roll_buckets())
+
+async def extract_flight_data(body: dict) -> Optional[dict]:
+    """Extract flight data from a CloudEvents envelope (or direct JSON)."""
+    if 'data' in body:
+        # CloudEvents format - data is a JSON string or an embedded object
+        data = body['data']
+        if isinstance(data, str):
+            try:
+                return await parse_json_payload(data)
+            except orjson.JSONDecodeError:
+                return data
+        return data
+    # Direct JSON format
+    return body
+
+# Fields copied from the raw flight message into an alert record; string
+# fields default to 'unknown' to match what the UI expects
+_FLIGHT_FIELDS = (
+    ('icao24', 'unknown'),
+    ('callsign', 'unknown'),
+    ('latitude', None),
+    ('longitude', None),
+    ('baro_altitude', None),
+    ('velocity', None),
+    ('origin_country', 'unknown')
+)
+
+def build_alert_record(flight_data: dict, squawk_code: str) -> dict:
+    """Build an alert record for a flight with an emergency squawk code."""
+    flight = {key: flight_data.get(key, default) for key, default in _FLIGHT_FIELDS}
+    return {
+        "alert_id": f"{flight['icao24']}-{time.time_ns()}",
+        "timestamp": _iso_now,
+        "squawk_code": squawk_code,
+        "description": EMERGENCY_SQUAWK_CODES[squawk_code],
+        "flight": flight
+    }
 
 @app.get("/health")
 async def health():
     """Health check endpoint"""
-    return {"status": "healthy", "service": "emergency-alert"}
+    return {
+        "status": "healthy",
+        "service": "emergency-alert",
+        "active_alerts": len(active_alerts),
+        "max_active_alerts": MAX_ACTIVE_ALERTS
+    }
 
 @app.post("/flight-update")
 async def flight_update_handler(request: Request):
@@ -69,379 +318,232 @@ async def flight_update_handler(request: Request):
     Checks for emergency squawk codes and creates alerts.
     """
     try:
-        body = await request.json()
-        
+        # orjson parses the raw bytes directly, skipping Starlette's
+        # stdlib-json path and the intermediate str decode
+        body = await parse_json_payload(await request.body())
+
         # Extract flight data from CloudEvents format
-        flight_data = None
-        if 'data' in body:
-            # CloudEvents format - data is base64 encoded or JSON string
-            data = body['data']
-            if isinstance(data, str):
-                try:
-                    flight_data = json.loads(data)
-                except json.JSONDecodeError:
-                    flight_data = data
-            else:
-                flight_data = data
-        else:
-            # Direct JSON format
-            flight_data = body
-        
+        flight_data = await extract_flight_data(body)
+
         if not flight_data:
             logger.warning("No flight data found in message")
             return {"status": "error", "message": "No flight data found"}
-        
-        # Check for emergency squawk code
-        squawk_code = check_emergency_squawk(flight_data)
-        
-        if squawk_code:
-            # Emergency detected!
-            alert_id = get_alert_id(flight_data)
-            alert_description = EMERGENCY_SQUAWK_CODES[squawk_code]
-            
-            alert_record = {
-                "alert_id": alert_id,
-                "timestamp": datetime.utcnow().isoformat() + "Z",
-                "squawk_code": squawk_code,
-                "description": alert_description,
-                "flight": {
-                    "icao24": flight_data.get('icao24', 'unknown'),
-                    "callsign": flight_data.get('callsign', 'unknown'),
-                    "latitude": flight_data.get('latitude'),
-                    "longitude": flight_data.get('longitude'),
-                    "baro_altitude": flight_data.get('baro_altitude'),
-                    "velocity": flight_data.get('velocity'),
-                    "origin_country": flight_data.get('origin_country', 'unknown')
-                }
-            }
-            
-            # Store as active alert
-            active_alerts[alert_id] = alert_record
-            
-            # Add to history
-            alert_history.append(alert_record.copy())
-            
-            logger.warning(f"🚨 EMERGENCY ALERT: {alert_description} - Flight {flight_data.get('callsign', 'unknown')} ({flight_data.get('icao24', 'unknown')}) - Squawk: {squawk_code}")
-            return {"status": "alert_created", "alert_id": alert_id, "squawk_code": squawk_code}
-        
-        return {"status": "success"}
-        
+
+        # Fast path: almost every message is a normal squawk
+        squawk = flight_data.get('squawk')
+        if squawk not in EMERGENCY_SQUAWK_SET:
+            return {"status": "success"}
+
+        # Emergency detected!
+        squawk_code = str(squawk).strip()
+        alert_record = build_alert_record(flight_data, squawk_code)
+        alert_id = alert_record['alert_id']
+
+        # Store as active alert
+        store_alert(alert_id, alert_record)
+
+        # Add to history (records are never mutated after creation, so the
+        # reference can be shared with active_alerts instead of copied)
+        append_history(alert_record)
+        count_alert()
+
+        # Write-through to the state store so alerts survive restarts and
+        # stay visible across workers; the in-memory dict is the L1 cache
+        persist_alerts([alert_record])
+
+        notify_alerts_changed()
+
+        # %-style args defer formatting to the log thread and keep the emoji
+        # prefix in a single constant
+        logger.warning(
+            "🚨 EMERGENCY ALERT: %s - Flight %s (%s) - Squawk: %s",
+            alert_record['description'],
+            alert_record['flight']['callsign'],
+            alert_record['flight']['icao24'],
+            squawk_code
+        )
+        return {"status": "alert_created", "alert_id": alert_id, "squawk_code": squawk_code}
+
     except Exception as e:
         logger.error(f"Error processing flight update: {e}")
         return {"status": "error", "message": str(e)}
 
-@app.get("/", response_class=HTMLResponse)
-async def alerts_ui():
-    """Web UI for displaying active emergency alerts."""
-    html_content = """
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Emergency Alerts - ADS-B Tracker</title>
-    <style>
-        * {
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }
-        
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen, Ubuntu, Cantarell, sans-serif;
-            background: linear-gradient(135deg, #1e3c72 0%, #2a5298 100%);
-            color: #333;
-            min-height: 100vh;
-            padding: 20px;
-        }
-        
-        .container {
-            max-width: 1200px;
-            margin: 0 auto;
-        }
-        
-        header {
-            background: rgba(255, 255, 255, 0.95);
-            padding: 20px;
-            border-radius: 10px;
-            margin-bottom: 20px;
-            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-        }
-        
-        h1 {
-            color: #d32f2f;
-            margin-bottom: 10px;
-        }
-        
-        .subtitle {
-            color: #666;
-            font-size: 14px;
-        }
-        
-        .alert-badge {
-            display: inline-block;
-            background: #d32f2f;
-            color: white;
-            padding: 5px 15px;
-            border-radius: 20px;
-            font-size: 12px;
-            font-weight: bold;
-            margin-left: 10px;
-        }
-        
-        .alert-card {
-            background: white;
-            border-left: 5px solid #d32f2f;
-            padding: 20px;
-            margin-bottom: 15px;
-            border-radius: 8px;
-            box-shadow: 0 2px 4px rgba(0, 0, 0, 0.1);
-            animation: slideIn 0.3s ease-out;
-        }
-        
-        @keyframes slideIn {
-            from {
-                opacity: 0;
-                transform: translateY(-10px);
-            }
-            to {
-                opacity: 1;
-                transform: translateY(0);
-            }
-        }
-        
-        .alert-header {
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            margin-bottom: 15px;
-        }
-        
-        .alert-type {
-            font-size: 24px;
-            font-weight: bold;
-            color: #d32f2f;
-        }
-        
-        .squawk-code {
-            background: #f44336;
-            color: white;
-            padding: 5px 12px;
-            border-radius: 5px;
-            font-weight: bold;
-            font-size: 14px;
-        }
-        
-        .alert-details {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-            gap: 15px;
-            margin-top: 15px;
-        }
-        
-        .detail-item {
-            background: #f5f5f5;
-            padding: 10px;
-            border-radius: 5px;
-        }
-        
-        .detail-label {
-            font-size: 12px;
-            color: #666;
-            text-transform: uppercase;
-            margin-bottom: 5px;
-        }
-        
-        .detail-value {
-            font-size: 16px;
-            font-weight: bold;
-            color: #333;
-        }
-        
-        .no-alerts {
-            background: white;
-            padding: 40px;
-            text-align: center;
-            border-radius: 10px;
-            color: #666;
-        }
-        
-        .no-alerts-icon {
-            font-size: 64px;
-            margin-bottom: 20px;
-        }
-        
-        .refresh-info {
-            text-align: center;
-            color: rgba(255, 255, 255, 0.8);
-            margin-top: 20px;
-            font-size: 14px;
-        }
-        
-        .timestamp {
-            color: #999;
-            font-size: 12px;
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <header>
-            <h1>🚨 Emergency Alerts <span id="alertCount" class="alert-badge">0</span></h1>
-            <p class="subtitle">Real-time monitoring of emergency squawk codes (7700, 7500, 7600)</p>
-        </header>
-        
-        <div id="alertsContainer"></div>
-        
-        <p class="refresh-info">Auto-refreshing every 5 seconds</p>
-    </div>
-    
-    <script>
-        const alertTypes = {
-            '7700': '🚨 General Emergency',
-            '7500': '✈️ Aircraft Hijacking',
-            '7600': '📻 Radio Communication Failure'
-        };
-        
-        const alertColors = {
-            '7700': '#d32f2f',
-            '7500': '#c62828',
-            '7600': '#ef6c00'
-        };
-        
-        function formatTimestamp(timestamp) {
-            const date = new Date(timestamp);
-            return date.toLocaleString();
-        }
-        
-        function renderAlerts(alerts) {
-            const container = document.getElementById('alertsContainer');
-            const countBadge = document.getElementById('alertCount');
-            
-            const alertsArray = Object.values(alerts);
-            countBadge.textContent = alertsArray.length;
-            
-            if (alertsArray.length === 0) {
-                container.innerHTML = `
-                    <div class="no-alerts">
-                        <div class="no-alerts-icon">✅</div>
-                        <h2>No Active Emergency Alerts</h2>
-                        <p>All flights are operating normally.</p>
-                    </div>
-                `;
-                return;
-            }
-            
-            // Sort by timestamp (most recent first)
-            alertsArray.sort((a, b) => new Date(b.timestamp) - new Date(a.timestamp));
-            
-            container.innerHTML = alertsArray.map(alert => {
-                const flight = alert.flight;
-                const color = alertColors[alert.squawk_code] || '#d32f2f';
-                
-                return `
-                    <div class="alert-card" style="border-left-color: ${color}">
-                        <div class="alert-header">
-                            <div class="alert-type">${alertTypes[alert.squawk_code] || '🚨 Emergency'}</div>
-                            <div class="squawk-code">Squawk: ${alert.squawk_code}</div>
-                        </div>
-                        <p style="color: #666; margin-bottom: 15px;">${alert.description}</p>
-                        <div class="alert-details">
-                            <div class="detail-item">
-                                <div class="detail-label">Callsign</div>
-                                <div class="detail-value">${flight.callsign || 'Unknown'}</div>
-                            </div>
-                            <div class="detail-item">
-                                <div class="detail-label">ICAO24</div>
-                                <div class="detail-value">${flight.icao24 || 'Unknown'}</div>
-                            </div>
-                            <div class="detail-item">
-                                <div class="detail-label">Origin</div>
-                                <div class="detail-value">${flight.origin_country || 'Unknown'}</div>
-                            </div>
-                            <div class="detail-item">
-                                <div class="detail-label">Altitude</div>
-                                <div class="detail-value">${flight.baro_altitude ? flight.baro_altitude.toFixed(0) + ' m' : 'N/A'}</div>
-                            </div>
-                            <div class="detail-item">
-                                <div class="detail-label">Speed</div>
-                                <div class="detail-value">${flight.velocity ? flight.velocity.toFixed(0) + ' m/s' : 'N/A'}</div>
-                            </div>
-                            <div class="detail-item">
-                                <div class="detail-label">Position</div>
-                                <div class="detail-value">${flight.latitude ? flight.latitude.toFixed(4) + ', ' + flight.longitude.toFixed(4) : 'N/A'}</div>
-                            </div>
-                        </div>
-                        <div class="timestamp" style="margin-top: 15px;">Alert Time: ${formatTimestamp(alert.timestamp)}</div>
-                    </div>
-                `;
-            }).join('');
-        }
-        
-        async function loadAlerts() {
-            try {
-                const response = await fetch('/api/v1/alerts/active');
-                const data = await response.json();
-                renderAlerts(data.alerts || {});
-            } catch (error) {
-                console.error('Error loading alerts:', error);
-            }
-        }
-        
-        // Load alerts on page load
-        loadAlerts();
-        
-        // Auto-refresh every 5 seconds
-        setInterval(loadAlerts, 5000);
-    </script>
-</body>
-</html>
+@app.post("/flight-update-bulk")
+async def flight_update_bulk_handler(request: Request):
+    """
+    Handle batched flight update messages from Dapr's bulk subscribe API.
+    A single POST carries up to maxMessagesCount CloudEvents, so the HTTP
+    round-trip and request parsing are amortized across the whole batch.
     """
-    return HTMLResponse(content=html_content)
+    body = await parse_json_payload(await request.body())
+
+    statuses = []
+    new_alerts = {}
+
+    for entry in body.get('entries', []):
+        entry_id = entry.get('entryId')
+        try:
+            flight_data = await extract_flight_data(entry.get('event', {}))
+
+            if flight_data and flight_data.get('squawk') in EMERGENCY_SQUAWK_SET:
+                squawk_code = str(flight_data['squawk']).strip()
+                alert_record = build_alert_record(flight_data, squawk_code)
+                new_alerts[alert_record['alert_id']] = alert_record
+                logger.warning(
+                    "🚨 EMERGENCY ALERT: %s - Flight %s (%s) - Squawk: %s",
+                    alert_record['description'],
+                    alert_record['flight']['callsign'],
+                    alert_record['flight']['icao24'],
+                    squawk_code
+                )
+
+            statuses.append({"entryId": entry_id, "status": "SUCCESS"})
+        except Exception as e:
+            logger.error(f"Error processing bulk entry {entry_id}: {e}")
+            statuses.append({"entryId": entry_id, "status": "RETRY"})
+
+    # Apply all alerts from the batch in one go to avoid per-message dict churn
+    if new_alerts:
+        active_alerts.update(new_alerts)
+        while len(active_alerts) > MAX_ACTIVE_ALERTS:
+            active_alerts.popitem(last=False)
+        for record in new_alerts.values():
+            append_history(record)
+        count_alert(len(new_alerts))
+        persist_alerts(list(new_alerts.values()))
+        notify_alerts_changed()
+
+    return {"statuses": statuses}
+
+@app.get("/")
+async def alerts_ui():
+    """Web UI for displaying active emergency alerts (served from disk)."""
+    return FileResponse(
+        os.path.join(STATIC_DIR, "index.html"),
+        headers={"Cache-Control": "public, max-age=300"}
+    )
 
 @app.get("/api/v1/alerts/active")
-async def get_active_alerts():
+async def get_active_alerts(request: Request):
     """Get all active emergency alerts."""
-    return {
-        "alerts": active_alerts,
-        "count": len(active_alerts),
-        "timestamp": datetime.utcnow().isoformat() + "Z"
-    }
+    global _snapshot_bytes, _snapshot_dirty
+    etag = str(_alerts_version)
+
+    # Unchanged since the client's last poll: skip body and encoding entirely
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    if _snapshot_dirty:
+        _snapshot_bytes = orjson.dumps({
+            "alerts": active_alerts,
+            "count": len(active_alerts),
+            "timestamp": _iso_now
+        })
+        _snapshot_dirty = False
+    return Response(
+        content=_snapshot_bytes,
+        media_type="application/json",
+        headers={"ETag": etag}
+    )
+
+@app.get("/api/v1/alerts/stream")
+async def stream_alerts():
+    """
+    Push active-alert snapshots over Server-Sent Events.
+    The browser gets one event per actual change instead of polling the
+    active-alerts endpoint every few seconds.
+    """
+    async def event_generator():
+        changed = asyncio.Event()
+        _stream_subscribers.add(changed)
+        try:
+            while True:
+                # Clear before snapshotting: a change that lands while the
+                # snapshot is being written to the socket re-sets the event
+                # and is picked up on the next iteration instead of lost
+                changed.clear()
+                yield {
+                    "data": orjson.dumps({
+                        "alerts": active_alerts,
+                        "count": len(active_alerts)
+                    }).decode()
+                }
+                await changed.wait()
+        finally:
+            _stream_subscribers.discard(changed)
+
+    return EventSourceResponse(event_generator())
 
 @app.get("/api/v1/alerts/history")
 async def get_alert_history(limit: int = 50):
     """Get alert history (most recent alerts)."""
-    history_list = list(alert_history)
-    # Sort by timestamp (most recent first)
-    history_list.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
-    # Limit results
-    history_list = history_list[:limit]
+    # Alerts are appended in chronological order, so the ring is already
+    # sorted - just walk it backwards from the head
+    history_list = history_snapshot(limit)
     
     return {
         "history": history_list,
         "count": len(history_list),
-        "total": len(alert_history),
-        "timestamp": datetime.utcnow().isoformat() + "Z"
+        "total": min(_history_head, HISTORY_SIZE),
+        "timestamp": _iso_now
+    }
+
+@app.get("/api/v1/alerts/stats")
+async def get_alert_stats():
+    """Get alert counts over exponentially coarser time buckets."""
+    return {
+        "current_minute": _current_minute_count,
+        "per_minute_last_hour": list(_minute_counts),
+        "per_hour_last_day": list(_hour_counts),
+        "per_day_last_month": list(_day_counts),
+        "timestamp": _iso_now
     }
 
+# Registered before the {alert_id} route: Starlette matches in
+# registration order, so the literal path must come first or it would be
+# captured as alert_id="clear-all"
+@app.delete("/api/v1/alerts/clear-all")
+async def clear_all_alerts():
+    """Clear all active alerts."""
+    alert_ids = list(active_alerts)
+    count = len(alert_ids)
+    active_alerts.clear()
+    # Delete the persisted copies too, or the state store would keep
+    # serving the cleared alerts until their TTL expires
+    for alert_id in alert_ids:
+        asyncio.create_task(asyncio.to_thread(_delete_alert_from_state, alert_id))
+    asyncio.create_task(asyncio.to_thread(_save_alert_index, []))
+    notify_alerts_changed()
+    return {"status": "success", "message": f"Cleared {count} alerts"}
+
 @app.delete("/api/v1/alerts/{alert_id}")
 async def clear_alert(alert_id: str):
     """Clear a specific alert (mark as resolved)."""
     if alert_id in active_alerts:
         del active_alerts[alert_id]
+        asyncio.create_task(asyncio.to_thread(_delete_alert_from_state, alert_id))
+        asyncio.create_task(
+            asyncio.to_thread(_save_alert_index, list(active_alerts)))
+        notify_alerts_changed()
         return {"status": "success", "message": f"Alert {alert_id} cleared"}
     return {"status": "error", "message": "Alert not found"}
 
-@app.delete("/api/v1/alerts/clear-all")
-async def clear_all_alerts():
-    """Clear all active alerts."""
-    count = len(active_alerts)
-    active_alerts.clear()
-    return {"status": "success", "message": f"Cleared {count} alerts"}
-
 if __name__ == "__main__":
     import uvicorn
     logger.info("🚨 Emergency Alert Service starting...")
     logger.info(f"Monitoring for emergency squawk codes: {list(EMERGENCY_SQUAWK_CODES.keys())}")
-    uvicorn.run(app, host="0.0.0.0", port=PORT)
+    # uvloop + httptools replace the default selector loop and h11 parser
+    # with libuv and a C HTTP parser - a straight throughput win for this
+    # short-request workload. Caveat: uvloop doesn't tolerate nest_asyncio
+    # style loop re-entry, so blocking calls must use asyncio.to_thread.
+    # WORKERS > 1 fragments the in-memory alert state; keep 1 unless alerts
+    # are persisted externally.
+    uvicorn.run(
+        "app:app",
+        host="0.0.0.0",
+        port=PORT,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WORKERS", "1"))
+    )
 
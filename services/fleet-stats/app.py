@@ -7,26 +7,116 @@ This demonstrates:
 2. Dapr State Store for persistence
 """
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import ORJSONResponse
+import redis.asyncio as aioredis
 from dapr.clients import DaprClient
-import json
+import asyncio
+import logging
+import numpy as np
+import orjson
+import zlib
+from functools import lru_cache
 import os
 import time
 
-app = FastAPI(title="Fleet Stats Service")
+# Per-message output goes through the logger at DEBUG so it costs one
+# disabled-level check in production; LOG_LEVEL=DEBUG turns it back on
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "WARNING"))
+logger = logging.getLogger("fleetstats")
+
+app = FastAPI(title="Fleet Stats Service", default_response_class=ORJSONResponse)
 
 PORT = int(os.getenv("PORT", "3001"))
 
-# In-memory statistics (will be persisted to state store)
+# In-memory statistics metadata. The per-category tables live below as
+# structure-of-arrays; the combined structure is persisted to the state
+# store in the original nested-dict form.
 stats = {
-    'by_airline': {},
-    'by_destination': {},
-    'by_origin': {},
-    'by_aircraft_type': {},
     'total_active': 0,
     'last_update': None
 }
 
+class CategoryStats:
+    """
+    Structure-of-arrays statistics for one grouping (airline, destination,
+    origin, aircraft type). Keys map to small int rows into four contiguous
+    NumPy arrays, so updates touch packed memory instead of nested dicts
+    and whole batches can be applied with np.add.at scatter-adds.
+    """
+
+    __slots__ = ('keys', 'names', 'count', 'total_altitude',
+                 'total_velocity', 'samples')
+
+    def __init__(self, capacity=64):
+        self.keys = {}   # key -> row
+        self.names = []  # row -> key
+        self.count = np.zeros(capacity, dtype=np.int64)
+        self.total_altitude = np.zeros(capacity, dtype=np.float64)
+        self.total_velocity = np.zeros(capacity, dtype=np.float64)
+        self.samples = np.zeros(capacity, dtype=np.int64)
+
+    def index(self, key):
+        """Return the row for key, growing the arrays when full."""
+        row = self.keys.get(key)
+        if row is None:
+            row = len(self.names)
+            if row >= len(self.count):
+                self._grow(len(self.count) * 2)
+            self.keys[key] = row
+            self.names.append(key)
+        return row
+
+    def _grow(self, capacity):
+        for field in ('count', 'total_altitude', 'total_velocity', 'samples'):
+            old = getattr(self, field)
+            grown = np.zeros(capacity, dtype=old.dtype)
+            grown[:len(old)] = old
+            setattr(self, field, grown)
+
+    def add(self, row, altitude, velocity):
+        """Apply one flight sample to a row."""
+        self.count[row] += 1
+        self.samples[row] += 1
+        if altitude:
+            self.total_altitude[row] += altitude
+        if velocity:
+            self.total_velocity[row] += velocity
+
+    def to_dict(self):
+        """Rebuild the nested-dict form for persistence and the REST API."""
+        return {
+            name: {
+                'count': int(self.count[row]),
+                'total_altitude': float(self.total_altitude[row]),
+                'total_velocity': float(self.total_velocity[row]),
+                'samples': int(self.samples[row])
+            }
+            for row, name in enumerate(self.names)
+        }
+
+    def load(self, data):
+        """Populate from the nested-dict form."""
+        for name, bucket in data.items():
+            row = self.index(name)
+            self.count[row] = bucket.get('count', 0)
+            self.total_altitude[row] = bucket.get('total_altitude', 0)
+            self.total_velocity[row] = bucket.get('total_velocity', 0)
+            self.samples[row] = bucket.get('samples', 0)
+
+# Per-category statistics tables
+airline_stats = CategoryStats()
+destination_stats = CategoryStats()
+origin_stats = CategoryStats()
+aircraft_type_stats = CategoryStats()
+
+CATEGORY_TABLES = {
+    'by_airline': airline_stats,
+    'by_destination': destination_stats,
+    'by_origin': origin_stats,
+    'by_aircraft_type': aircraft_type_stats
+}
+
 # Dapr client for state operations
 # Connect to Dapr sidecar on localhost (shared network namespace)
 # Dapr Python SDK uses DAPR_HTTP_PORT environment variable automatically
@@ -35,145 +125,213 @@ dapr_client = DaprClient()
 # State store component name
 STATESTORE_NAME = 'statestore'
 
+# Read-through cache in front of the GET endpoints. Responses are served
+# straight from Redis for up to CACHE_TTL_SECONDS before being rebuilt
+# from the in-memory tables, so repeated polling costs one Redis GET
+# instead of a Python aggregation pass. Cache errors fall through to the
+# normal path. The default matches redisHost in components/statestore.yaml:
+# on dapr-network Redis is the 'redis' service, not localhost.
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379")
+CACHE_TTL_SECONDS = 5
+
+_redis = None
+
+async def _cache_get(key):
+    if _redis is None:
+        return None
+    try:
+        return await _redis.get(key)
+    except Exception:
+        return None
+
+async def _cache_set(key, payload):
+    if _redis is None:
+        return
+    try:
+        await _redis.setex(key, CACHE_TTL_SECONDS, payload)
+    except Exception:
+        pass
+
+def _cached_json(payload):
+    """Return an already-serialized cached payload as a JSON response."""
+    return Response(content=payload, media_type="application/json")
+
+# Lookup tables for the inference helpers, hoisted to module scope so the
+# hot path never rebuilds them per call.
+AIRLINE_CODES = {
+    'DL': 'Delta',
+    'UA': 'United',
+    'WN': 'Southwest',
+    'QF': 'Qantas',
+    'EK': 'Emirates'
+}
+
+# Major airports for demo purposes
+AIRPORTS = {
+    'KJFK': 'John F. Kennedy International Airport',
+    'KLAX': 'Los Angeles International Airport',
+    'EGLL': 'London Heathrow Airport',
+    'YSSY': 'Sydney Kingsford Smith Airport',
+    'OMDB': 'Dubai International Airport',
+    'KORD': 'Chicago O\'Hare International Airport',
+    'KDFW': 'Dallas/Fort Worth International Airport',
+    'KATL': 'Hartsfield-Jackson Atlanta International Airport'
+}
+
+AIRPORT_COORDS = {
+    'KJFK': (40.6413, -73.7781),
+    'KLAX': (33.9425, -118.4081),
+    'EGLL': (51.47, -0.4543),
+    'YSSY': (-33.9399, 151.1753),
+    'OMDB': (25.2532, 55.3657),
+    'KORD': (41.9786, -87.9048),
+    'KDFW': (32.8998, -97.0403),
+    'KATL': (33.6407, -84.4277)
+}
+
+# Map countries to common origin airports
+COUNTRY_AIRPORTS = {
+    'United States': ('KJFK', 'KLAX', 'KORD', 'KDFW', 'KATL'),
+    'United Kingdom': ('EGLL',),
+    'Australia': ('YSSY',),
+    'United Arab Emirates': ('OMDB',)
+}
+
+DEFAULT_AIRPORTS = ('KJFK', 'KLAX', 'EGLL', 'YSSY', 'OMDB')
+
+# Airport coordinates packed into contiguous float64 arrays so the
+# closest-airport search is one vectorized argmin instead of a Python loop;
+# row order matches AIRPORT_CODES
+AIRPORT_CODES = tuple(AIRPORT_COORDS)
+_airport_lats = np.array([c[0] for c in AIRPORT_COORDS.values()], dtype=np.float64)
+_airport_lons = np.array([c[1] for c in AIRPORT_COORDS.values()], dtype=np.float64)
+
+def _closest_airport(lat, lon):
+    """Return (index, squared distance in degrees^2) of the closest airport."""
+    dx = _airport_lats - lat
+    dy = _airport_lons - lon
+    d2 = dx * dx + dy * dy
+    i = int(d2.argmin())
+    return i, float(d2[i])
+
+# crc32(callsign) % 100 indexes a packed byte table: 50% narrow body,
+# 30% wide body, 15% regional, 5% cargo. crc32 is much cheaper than
+# Python's string hash for short callsigns, stable across processes, and
+# the byte-table lookup replaces the old if/elif bucket cascade.
+_AC_TABLE = bytes([0] * 50 + [1] * 30 + [2] * 15 + [3] * 5)
+_AC_NAMES = ('Narrow Body', 'Wide Body', 'Regional', 'Cargo')
+
+# 26x26 direct table indexed by the two leading ASCII letters, turning
+# the per-message dict hash+probe into two subscriptions
+_AIRLINE_LUT = [None] * 676
+for _code, _airline in AIRLINE_CODES.items():
+    _AIRLINE_LUT[(ord(_code[0]) - 65) * 26 + (ord(_code[1]) - 65)] = _airline
+
 def get_airline_from_callsign(callsign):
     """Extract airline from callsign (first 2 letters)."""
     if not callsign or len(callsign) < 2:
         return 'Unknown'
-    
-    airline_codes = {
-        'DL': 'Delta',
-        'UA': 'United',
-        'WN': 'Southwest',
-        'QF': 'Qantas',
-        'EK': 'Emirates'
-    }
-    
-    code = callsign[:2].strip()
-    return airline_codes.get(code, 'Other')
+    c0 = callsign[0]
+    c1 = callsign[1]
+    if 'A' <= c0 <= 'Z' and 'A' <= c1 <= 'Z':
+        return _AIRLINE_LUT[(ord(c0) - 65) * 26 + ord(c1) - 65] or 'Other'
+    return 'Other'
+
+# Translation table that deletes every non-digit ASCII character, so the
+# flight number falls out of one C-level str.translate pass instead of a
+# filter generator + join per call
+_KEEP_DIGITS = str.maketrans('', '', ''.join(
+    c for c in map(chr, range(128)) if not c.isdigit()))
 
-def infer_destination_from_flight(flight):
+def _callsign_flight_num(callsign):
+    """Parse the numeric part of a callsign, defaulting to 0."""
+    digits = callsign.translate(_KEEP_DIGITS)
+    try:
+        return int(digits) if digits else 0
+    except ValueError:
+        # The delete table only covers ASCII, so a non-ASCII character in
+        # the callsign survives into digits
+        return 0
+
+@lru_cache(maxsize=8192)
+def _destination_for(lat, lon, flight_num):
+    """Pure destination inference keyed on rounded position + flight number."""
+    if lat is not None and lon is not None:
+        # Simple distance-based inference (for demo)
+        # In real system, would use proper airport database
+        i, d2 = _closest_airport(lat, lon)
+        if d2 < 50 ** 2:  # Within reasonable distance (degrees, squared)
+            return AIRPORT_CODES[i]
+
+    # Fallback: infer from the flight number (synthetic);
+    # flight_num is None when the flight has no callsign
+    if flight_num is not None:
+        airport_list = list(AIRPORTS.keys())
+        return airport_list[flight_num % len(airport_list)]
+
+    return 'Unknown'
+
+def infer_destination_from_flight(flight, flight_num):
     """
     Infer destination airport from flight data.
     In mock mode, we'll use synthetic logic based on position and callsign.
+    Positions are rounded to 0.1 degree for the memoization key; the
+    closest-airport answer is insensitive at that resolution and repeat
+    broadcasts from the same aircraft then hit the cache.
     """
-    # Major airports for demo purposes
-    airports = {
-        'KJFK': 'John F. Kennedy International Airport',
-        'KLAX': 'Los Angeles International Airport',
-        'EGLL': 'London Heathrow Airport',
-        'YSSY': 'Sydney Kingsford Smith Airport',
-        'OMDB': 'Dubai International Airport',
-        'KORD': 'Chicago O\'Hare International Airport',
-        'KDFW': 'Dallas/Fort Worth International Airport',
-        'KATL': 'Hartsfield-Jackson Atlanta International Airport'
-    }
-    
-    # Infer from position (closest major airport)
     lat = flight.get('latitude')
     lon = flight.get('longitude')
-    
-    if lat and lon:
-        # Simple distance-based inference (for demo)
-        # In real system, would use proper airport database
-        airport_distances = {
-            'KJFK': ((lat - 40.6413)**2 + (lon + 73.7781)**2)**0.5,
-            'KLAX': ((lat - 33.9425)**2 + (lon + 118.4081)**2)**0.5,
-            'EGLL': ((lat - 51.47)**2 + (lon + 0.4543)**2)**0.5,
-            'YSSY': ((lat + 33.9399)**2 + (lon - 151.1753)**2)**0.5,
-            'OMDB': ((lat - 25.2532)**2 + (lon - 55.3657)**2)**0.5,
-            'KORD': ((lat - 41.9786)**2 + (lon + 87.9048)**2)**0.5,
-            'KDFW': ((lat - 32.8998)**2 + (lon + 97.0403)**2)**0.5,
-            'KATL': ((lat - 33.6407)**2 + (lon + 84.4277)**2)**0.5
-        }
-        
-        # Find closest airport
-        closest = min(airport_distances.items(), key=lambda x: x[1])
-        if closest[1] < 50:  # Within reasonable distance (degrees)
-            return closest[0]
-    
-    # Fallback: infer from callsign pattern (synthetic)
-    callsign = flight.get('callsign', '').strip()
-    if callsign:
-        # Use flight number modulo to assign destination
-        try:
-            flight_num = int(''.join(filter(str.isdigit, callsign)) or '0')
-            airport_list = list(airports.keys())
-            return airport_list[flight_num % len(airport_list)]
-        except:
-            pass
-    
+    return _destination_for(
+        round(lat, 1) if lat else None,
+        round(lon, 1) if lon else None,
+        flight_num
+    )
+
+@lru_cache(maxsize=8192)
+def _origin_for(origin_country, icao24, flight_num):
+    """Pure origin inference keyed on country + icao24 + flight number."""
+    airports = COUNTRY_AIRPORTS.get(origin_country)
+    if airports:
+        # Use icao24 hash to consistently assign origin
+        if icao24:
+            return airports[hash(icao24) % len(airports)]
+        return airports[0]
+
+    # Fallback: infer from the flight number, with a different offset for
+    # origin vs destination; None means the flight has no callsign
+    if flight_num is not None:
+        return DEFAULT_AIRPORTS[(flight_num + 1) % len(DEFAULT_AIRPORTS)]
+
     return 'Unknown'
 
-def infer_origin_from_flight(flight):
+def infer_origin_from_flight(flight, flight_num):
     """
     Infer origin airport from flight data.
     In mock mode, we'll use synthetic logic.
     """
-    # For demo, use origin_country to infer origin airport
-    origin_country = flight.get('origin_country', '')
-    
-    # Map countries to common origin airports
-    country_airports = {
-        'United States': ['KJFK', 'KLAX', 'KORD', 'KDFW', 'KATL'],
-        'United Kingdom': ['EGLL'],
-        'Australia': ['YSSY'],
-        'United Arab Emirates': ['OMDB']
-    }
-    
-    if origin_country in country_airports:
-        airports = country_airports[origin_country]
-        # Use icao24 hash to consistently assign origin
-        icao24 = flight.get('icao24', '')
-        if icao24:
-            idx = hash(icao24) % len(airports)
-            return airports[idx]
-        return airports[0]
-    
-    # Fallback: infer from callsign
-    callsign = flight.get('callsign', '').strip()
-    if callsign:
-        try:
-            flight_num = int(''.join(filter(str.isdigit, callsign)) or '0')
-            # Use different offset for origin vs destination
-            default_airports = ['KJFK', 'KLAX', 'EGLL', 'YSSY', 'OMDB']
-            return default_airports[(flight_num + 1) % len(default_airports)]
-        except:
-            pass
-    
-    return 'Unknown'
+    return _origin_for(
+        flight.get('origin_country', ''),
+        flight.get('icao24', ''),
+        flight_num
+    )
+
+def _aircraft_type_for(callsign):
+    """Branchless aircraft-type inference: crc32 bucket into a byte table."""
+    return _AC_NAMES[_AC_TABLE[zlib.crc32(callsign.encode()) % 100]]
 
-def infer_aircraft_type_from_flight(flight):
+def infer_aircraft_type_from_flight(callsign, altitude, velocity):
     """
     Infer aircraft type from flight data.
     In mock mode, use synthetic logic based on callsign patterns.
     """
-    callsign = flight.get('callsign', '').strip()
-    
-    # Aircraft type lookup based on airline and flight number patterns
-    # This is synthetic for demo purposes
-    aircraft_types = {
-        'Narrow Body': ['B737', 'A320', 'A321', 'B757'],
-        'Wide Body': ['B777', 'B787', 'A330', 'A350', 'B747'],
-        'Regional': ['CRJ', 'ERJ', 'E175', 'E190'],
-        'Cargo': ['B767', 'B777F', 'A330F']
-    }
-    
     # Use callsign hash to consistently assign aircraft type
     if callsign:
-        hash_val = hash(callsign) % 100
-        if hash_val < 50:
-            return 'Narrow Body'
-        elif hash_val < 80:
-            return 'Wide Body'
-        elif hash_val < 95:
-            return 'Regional'
-        else:
-            return 'Cargo'
-    
+        return _aircraft_type_for(callsign)
+
     # Fallback based on altitude/velocity (synthetic)
-    altitude = flight.get('baro_altitude', 0) or 0
-    velocity = flight.get('velocity', 0) or 0
-    
+    altitude = altitude or 0
+    velocity = velocity or 0
+
     if altitude > 10000 and velocity > 200:
         return 'Wide Body'
     elif altitude > 5000:
@@ -183,36 +341,219 @@ def infer_aircraft_type_from_flight(flight):
 
 def load_stats_from_state():
     """Load statistics from Dapr state store."""
-    global stats
     try:
         # Try to get stats from state store
         response = dapr_client.get_state(STATESTORE_NAME, "fleet:stats:summary")
         if response.data:
-            stats = json.loads(response.data.decode('utf-8'))
-            print(f"✓ Loaded stats from state store: {stats['total_active']} total flights")
+            data = orjson.loads(response.data)
+            for key, table in CATEGORY_TABLES.items():
+                table.load(data.get(key, {}))
+            # Recompute once from the persisted counts rather than trusting
+            # the stored total; updates then maintain it incrementally
+            stats['total_active'] = int(airline_stats.count.sum())
+            stats['last_update'] = data.get('last_update')
+            logger.info("Loaded stats from state store: %d total flights", stats['total_active'])
     except Exception as e:
-        print(f"⚠ Could not load from state store (first run?): {e}")
-        # Start with empty stats
-        stats = {
-            'by_airline': {},
-            'by_destination': {},
-            'by_origin': {},
-            'by_aircraft_type': {},
-            'total_active': 0,
-            'last_update': None
-        }
+        logger.warning("Could not load from state store (first run?): %s", e)
+        # Start with empty stats (the tables above begin empty)
 
 def save_stats_to_state():
     """Save statistics to Dapr state store."""
     try:
         stats['last_update'] = time.time()
+        payload = {key: table.to_dict() for key, table in CATEGORY_TABLES.items()}
+        payload['total_active'] = stats['total_active']
+        payload['last_update'] = stats['last_update']
         dapr_client.save_state(
             STATESTORE_NAME,
             "fleet:stats:summary",
-            json.dumps(stats).encode('utf-8')
+            orjson.dumps(payload)
         )
     except Exception as e:
-        print(f"⚠ Error saving to state store: {e}")
+        logger.error("Error saving to state store: %s", e)
+
+# Bumped on every mutation; the GET response builders below memoize on it
+# so unchanged stats are never re-aggregated
+_stats_version = 0
+
+# Set when stats change; the writer loop below coalesces bursts of updates
+# into one state-store write every couple of seconds
+_stats_dirty = asyncio.Event()
+
+async def _log_summary_loop():
+    """Log one stats summary every 10s instead of one line per message."""
+    while True:
+        await asyncio.sleep(10)
+        logger.info("fleet stats: %d airlines, %d total flights",
+                    len(airline_stats.names), stats['total_active'])
+
+async def _state_writer_loop():
+    """
+    Write-behind persistence: wait until stats are dirty, then save once via
+    the thread pool so the blocking Dapr call never stalls the event loop.
+    """
+    while True:
+        await _stats_dirty.wait()
+        _stats_dirty.clear()
+        await asyncio.to_thread(save_stats_to_state)
+        # Coalesce: at most one state-store write per interval
+        await asyncio.sleep(2.0)
+
+def _extract_flight_generic(body):
+    """Extract the flight payload from a CloudEvents envelope (or direct JSON)."""
+    if 'data' in body:
+        # CloudEvents format
+        if isinstance(body['data'], str):
+            return orjson.loads(body['data'])
+        return body['data']
+    if 'data_base64' in body:
+        # Base64 encoded data (unlikely but possible)
+        import base64
+        decoded = base64.b64decode(body['data_base64'])
+        return orjson.loads(decoded)
+    # Direct data
+    return body
+
+def _unwrap_data_dict(body):
+    """Monomorphic fast path: envelope with an embedded dict payload."""
+    flight = body['data']
+    if type(flight) is dict:
+        return flight
+    raise TypeError("data is not a dict")
+
+def _unwrap_data_str(body):
+    """Monomorphic fast path: envelope with a JSON-string payload."""
+    return orjson.loads(body['data'])
+
+# Dapr delivers every message with the same envelope shape in practice,
+# so the first message picks the matching fast path and later calls
+# dispatch straight through this function pointer. A shape change makes
+# the fast path raise (KeyError for a missing data field, TypeError for
+# a non-dict payload, ValueError/orjson.JSONDecodeError when the str
+# path gets a non-string) and drops back to the generic unwrapper.
+_unwrap = None
+
+def extract_flight(body):
+    """Extract the flight payload, specializing on the observed envelope shape."""
+    global _unwrap
+    if _unwrap is not None:
+        try:
+            return _unwrap(body)
+        except (KeyError, TypeError, ValueError):
+            _unwrap = None
+
+    flight = _extract_flight_generic(body)
+    if 'data' in body:
+        _unwrap = _unwrap_data_str if isinstance(body['data'], str) else _unwrap_data_dict
+    return flight
+
+def _resolve_flight(flight):
+    """
+    Resolve one flight to its category rows and hoisted scalars. Raises on
+    malformed input (e.g. a payload that is not a flight dict), so callers
+    can reject a single message before any table is mutated.
+    """
+    # Read each flight field once; every inference helper below reuses
+    # the hoisted locals instead of re-probing the dict
+    callsign = flight.get('callsign', '').strip()
+    flight_num = _callsign_flight_num(callsign) if callsign else None
+    altitude = flight.get('baro_altitude')
+    velocity = flight.get('velocity')
+
+    airline = get_airline_from_callsign(callsign)
+    destination = infer_destination_from_flight(flight, flight_num)
+    origin = infer_origin_from_flight(flight, flight_num)
+    aircraft_type = infer_aircraft_type_from_flight(callsign, altitude, velocity)
+
+    return (
+        airline_stats.index(airline),
+        destination_stats.index(destination),
+        origin_stats.index(origin),
+        aircraft_type_stats.index(aircraft_type),
+        altitude,
+        velocity
+    )
+
+def update_stats(flight):
+    """Apply a single flight update to the in-memory statistics."""
+    global _stats_version
+    _stats_version += 1
+
+    airline_row, destination_row, origin_row, aircraft_type_row, altitude, velocity = \
+        _resolve_flight(flight)
+
+    airline_stats.add(airline_row, altitude, velocity)
+    destination_stats.add(destination_row, altitude, velocity)
+    origin_stats.add(origin_row, altitude, velocity)
+    aircraft_type_stats.add(aircraft_type_row, altitude, velocity)
+
+    # Each update adds exactly one flight, so the total is incremental
+    stats['total_active'] += 1
+
+    logger.debug("stats: %s=%d total=%d",
+                 airline_stats.names[airline_row],
+                 airline_stats.count[airline_row], stats['total_active'])
+
+def _aggregate_batch(tables_rows, altitudes, velocities, has_altitude, has_velocity):
+    """
+    Fused batch aggregation kernel: compress the altitude and velocity
+    samples once, then scatter-add counts and totals into every category
+    table. Hoisting the boolean compression out of the per-table calls
+    saves six temporary arrays per batch, and the whole kernel stays in
+    NumPy's C loops.
+    """
+    alt_values = altitudes[has_altitude]
+    vel_values = velocities[has_velocity]
+    for table, rows in tables_rows:
+        np.add.at(table.count, rows, 1)
+        np.add.at(table.samples, rows, 1)
+        np.add.at(table.total_altitude, rows[has_altitude], alt_values)
+        np.add.at(table.total_velocity, rows[has_velocity], vel_values)
+
+def update_stats_batch(resolved):
+    """
+    Aggregate a batch of already-resolved flights at once. The per-entry
+    resolution happened in the handler (so one bad message is rejected
+    individually); here the rows and scalars are packed into arrays and
+    one fused kernel call updates every category table.
+    """
+    global _stats_version
+    _stats_version += 1
+
+    n = len(resolved)
+    airline_rows = np.empty(n, dtype=np.intp)
+    destination_rows = np.empty(n, dtype=np.intp)
+    origin_rows = np.empty(n, dtype=np.intp)
+    aircraft_type_rows = np.empty(n, dtype=np.intp)
+    altitudes = np.zeros(n, dtype=np.float64)
+    velocities = np.zeros(n, dtype=np.float64)
+    has_altitude = np.zeros(n, dtype=bool)
+    has_velocity = np.zeros(n, dtype=bool)
+
+    for i, (airline_row, destination_row, origin_row, aircraft_type_row,
+            altitude, velocity) in enumerate(resolved):
+        airline_rows[i] = airline_row
+        destination_rows[i] = destination_row
+        origin_rows[i] = origin_row
+        aircraft_type_rows[i] = aircraft_type_row
+        if altitude:
+            altitudes[i] = altitude
+            has_altitude[i] = True
+        if velocity:
+            velocities[i] = velocity
+            has_velocity[i] = True
+
+    _aggregate_batch(
+        (
+            (airline_stats, airline_rows),
+            (destination_stats, destination_rows),
+            (origin_stats, origin_rows),
+            (aircraft_type_stats, aircraft_type_rows)
+        ),
+        altitudes, velocities, has_altitude, has_velocity
+    )
+
+    stats['total_active'] += n
 
 # Subscribe to flight-update topic
 # Dapr will call this endpoint when messages arrive on the flight-update topic
@@ -220,117 +561,47 @@ def save_stats_to_state():
 async def flight_update_handler(request: Request):
     """Handle flight update events from Pub/Sub."""
     try:
-        # Get the raw request body
-        body = await request.json()
-        
-        # Dapr wraps the data in CloudEvents format
-        # Extract the actual flight data
-        if 'data' in body:
-            # CloudEvents format
-            if isinstance(body['data'], str):
-                flight = json.loads(body['data'])
-            else:
-                flight = body['data']
-        elif 'data_base64' in body:
-            # Base64 encoded data (unlikely but possible)
-            import base64
-            decoded = base64.b64decode(body['data_base64'])
-            flight = json.loads(decoded.decode('utf-8'))
-        else:
-            # Direct data
-            flight = body
-        
-        # Extract airline
-        airline = get_airline_from_callsign(flight.get('callsign', ''))
-        
-        # Infer destination and origin
-        destination = infer_destination_from_flight(flight)
-        origin = infer_origin_from_flight(flight)
-        aircraft_type = infer_aircraft_type_from_flight(flight)
-        
-        # Update airline statistics
-        if airline not in stats['by_airline']:
-            stats['by_airline'][airline] = {
-                'count': 0,
-                'total_altitude': 0,
-                'total_velocity': 0,
-                'samples': 0
-            }
-        
-        stats['by_airline'][airline]['count'] += 1
-        stats['by_airline'][airline]['samples'] += 1
-        
-        if flight.get('baro_altitude'):
-            stats['by_airline'][airline]['total_altitude'] += flight['baro_altitude']
-        if flight.get('velocity'):
-            stats['by_airline'][airline]['total_velocity'] += flight['velocity']
-        
-        # Update destination statistics
-        if destination not in stats['by_destination']:
-            stats['by_destination'][destination] = {
-                'count': 0,
-                'total_altitude': 0,
-                'total_velocity': 0,
-                'samples': 0
-            }
-        
-        stats['by_destination'][destination]['count'] += 1
-        stats['by_destination'][destination]['samples'] += 1
-        
-        if flight.get('baro_altitude'):
-            stats['by_destination'][destination]['total_altitude'] += flight['baro_altitude']
-        if flight.get('velocity'):
-            stats['by_destination'][destination]['total_velocity'] += flight['velocity']
-        
-        # Update origin statistics
-        if origin not in stats['by_origin']:
-            stats['by_origin'][origin] = {
-                'count': 0,
-                'total_altitude': 0,
-                'total_velocity': 0,
-                'samples': 0
-            }
-        
-        stats['by_origin'][origin]['count'] += 1
-        stats['by_origin'][origin]['samples'] += 1
-        
-        if flight.get('baro_altitude'):
-            stats['by_origin'][origin]['total_altitude'] += flight['baro_altitude']
-        if flight.get('velocity'):
-            stats['by_origin'][origin]['total_velocity'] += flight['velocity']
-        
-        # Update aircraft type statistics
-        if aircraft_type not in stats['by_aircraft_type']:
-            stats['by_aircraft_type'][aircraft_type] = {
-                'count': 0,
-                'total_altitude': 0,
-                'total_velocity': 0,
-                'samples': 0
-            }
-        
-        stats['by_aircraft_type'][aircraft_type]['count'] += 1
-        stats['by_aircraft_type'][aircraft_type]['samples'] += 1
-        
-        if flight.get('baro_altitude'):
-            stats['by_aircraft_type'][aircraft_type]['total_altitude'] += flight['baro_altitude']
-        if flight.get('velocity'):
-            stats['by_aircraft_type'][aircraft_type]['total_velocity'] += flight['velocity']
-        
-        # Calculate total active flights (sum of counts)
-        stats['total_active'] = sum(a['count'] for a in stats['by_airline'].values())
-        
-        # Save to state store periodically (every 10 updates)
-        if stats['total_active'] % 10 == 0:
-            save_stats_to_state()
-        
-        print(f"📊 Updated stats: {airline} = {stats['by_airline'][airline]['count']} | Total: {stats['total_active']}")
-        
+        body = orjson.loads(await request.body())
+        flight = extract_flight(body)
+        update_stats(flight)
+        _stats_dirty.set()
+
         return {"status": "success"}
-        
+
     except Exception as e:
-        print(f"❌ Error processing flight update: {e}")
+        logger.error("Error processing flight update: %s", e)
         return {"status": "error", "message": str(e)}
 
+@app.post("/flight-update-bulk")
+async def flight_update_bulk_handler(request: Request):
+    """
+    Handle batched flight update events from Dapr's bulk subscribe API.
+    One POST carries up to maxMessagesCount CloudEvents, amortizing the
+    HTTP round-trip and persisting state once per batch.
+    """
+    body = orjson.loads(await request.body())
+
+    statuses = []
+    resolved = []
+    for entry in body.get('entries', []):
+        entry_id = entry.get('entryId')
+        try:
+            # Resolve inside the per-entry try so one malformed message is
+            # retried alone instead of failing the whole batch
+            resolved.append(_resolve_flight(extract_flight(entry.get('event', {}))))
+            statuses.append({"entryId": entry_id, "status": "SUCCESS"})
+        except Exception as e:
+            logger.error("Error processing bulk entry %s: %s", entry_id, e)
+            statuses.append({"entryId": entry_id, "status": "RETRY"})
+
+    if resolved:
+        update_stats_batch(resolved)
+        # The write-behind task persists once per interval, not per batch
+        _stats_dirty.set()
+
+    return {"statuses": statuses}
+
+
 # REST API endpoints
 @app.get("/health")
 async def health():
@@ -340,9 +611,9 @@ async def health():
         "service": "fleet-stats"
     }
 
-@app.get("/api/v1/fleet/stats/summary")
-async def get_summary():
-    """Get overall fleet statistics summary."""
+@lru_cache(maxsize=4)
+def _build_summary(version):
+    """Build the serialized summary response for one stats version."""
     # Calculate averages
     summary = {
         "timestamp": time.time(),
@@ -351,18 +622,16 @@ async def get_summary():
         "airlines_with_10_plus_flights": []
     }
     
-    for airline, data in stats['by_airline'].items():
+    for airline, data in airline_stats.to_dict().items():
         avg_altitude = data['total_altitude'] / data['samples'] if data['samples'] > 0 else 0
         avg_velocity = data['total_velocity'] / data['samples'] if data['samples'] > 0 else 0
         
-        airline_stats = {
+        summary['by_airline'][airline] = {
             "count": data['count'],
             "avg_altitude": round(avg_altitude, 2),
             "avg_velocity": round(avg_velocity, 2)
         }
         
-        summary['by_airline'][airline] = airline_stats
-        
         # Add to airlines with 10+ flights list
         if data['count'] > 10:
             summary['airlines_with_10_plus_flights'].append(airline)
@@ -373,13 +642,24 @@ async def get_summary():
         reverse=True
     )
     
-    return summary
+    return orjson.dumps(summary)
 
-@app.get("/api/v1/fleet/stats/by-airline")
-async def get_by_airline():
-    """Get statistics grouped by airline."""
+@app.get("/api/v1/fleet/stats/summary")
+async def get_summary():
+    """Get overall fleet statistics summary."""
+    cached = await _cache_get("fleet:cache:summary")
+    if cached is not None:
+        return _cached_json(cached)
+
+    payload = _build_summary(_stats_version)
+    await _cache_set("fleet:cache:summary", payload)
+    return _cached_json(payload)
+
+@lru_cache(maxsize=4)
+def _build_by_airline(version):
+    """Build the serialized by-airline response for one stats version."""
     result = {}
-    for airline, data in stats['by_airline'].items():
+    for airline, data in airline_stats.to_dict().items():
         avg_altitude = data['total_altitude'] / data['samples'] if data['samples'] > 0 else 0
         avg_velocity = data['total_velocity'] / data['samples'] if data['samples'] > 0 else 0
         
@@ -388,7 +668,19 @@ async def get_by_airline():
             "avg_altitude": round(avg_altitude, 2),
             "avg_velocity": round(avg_velocity, 2)
         }
-    return result
+
+    return orjson.dumps(result)
+
+@app.get("/api/v1/fleet/stats/by-airline")
+async def get_by_airline():
+    """Get statistics grouped by airline."""
+    cached = await _cache_get("fleet:cache:by-airline")
+    if cached is not None:
+        return _cached_json(cached)
+
+    payload = _build_by_airline(_stats_version)
+    await _cache_set("fleet:cache:by-airline", payload)
+    return _cached_json(payload)
 
 @app.get("/api/v1/fleet/stats/airlines-with-min-flights")
 async def get_airlines_with_min_flights(min_flights: int = 10):
@@ -398,13 +690,25 @@ async def get_airlines_with_min_flights(min_flights: int = 10):
     Query parameter:
     - min_flights: Minimum number of flights required (default: 10)
     """
+    cache_key = f"fleet:cache:min-flights:{min_flights}"
+    cached = await _cache_get(cache_key)
+    if cached is not None:
+        return _cached_json(cached)
+
+    payload = _build_min_flights(_stats_version, min_flights)
+    await _cache_set(cache_key, payload)
+    return _cached_json(payload)
+
+@lru_cache(maxsize=16)
+def _build_min_flights(version, min_flights):
+    """Build the serialized min-flights response for one stats version."""
     result = {
         "min_flights": min_flights,
         "airlines": [],
         "count": 0
     }
     
-    for airline, data in stats['by_airline'].items():
+    for airline, data in airline_stats.to_dict().items():
         if data['count'] > min_flights:
             avg_altitude = data['total_altitude'] / data['samples'] if data['samples'] > 0 else 0
             avg_velocity = data['total_velocity'] / data['samples'] if data['samples'] > 0 else 0
@@ -420,13 +724,13 @@ async def get_airlines_with_min_flights(min_flights: int = 10):
     # Sort by count (descending)
     result['airlines'].sort(key=lambda x: x['count'], reverse=True)
     
-    return result
+    return orjson.dumps(result)
 
-@app.get("/api/v1/fleet/stats/by-destination")
-async def get_by_destination():
-    """Get statistics grouped by destination airport."""
+@lru_cache(maxsize=4)
+def _build_by_destination(version):
+    """Build the serialized by-destination response for one stats version."""
     result = {}
-    for destination, data in stats['by_destination'].items():
+    for destination, data in destination_stats.to_dict().items():
         avg_altitude = data['total_altitude'] / data['samples'] if data['samples'] > 0 else 0
         avg_velocity = data['total_velocity'] / data['samples'] if data['samples'] > 0 else 0
         
@@ -435,13 +739,25 @@ async def get_by_destination():
             "avg_altitude": round(avg_altitude, 2),
             "avg_velocity": round(avg_velocity, 2)
         }
-    return result
 
-@app.get("/api/v1/fleet/stats/by-origin")
-async def get_by_origin():
-    """Get statistics grouped by origin airport."""
+    return orjson.dumps(result)
+
+@app.get("/api/v1/fleet/stats/by-destination")
+async def get_by_destination():
+    """Get statistics grouped by destination airport."""
+    cached = await _cache_get("fleet:cache:by-destination")
+    if cached is not None:
+        return _cached_json(cached)
+
+    payload = _build_by_destination(_stats_version)
+    await _cache_set("fleet:cache:by-destination", payload)
+    return _cached_json(payload)
+
+@lru_cache(maxsize=4)
+def _build_by_origin(version):
+    """Build the serialized by-origin response for one stats version."""
     result = {}
-    for origin, data in stats['by_origin'].items():
+    for origin, data in origin_stats.to_dict().items():
         avg_altitude = data['total_altitude'] / data['samples'] if data['samples'] > 0 else 0
         avg_velocity = data['total_velocity'] / data['samples'] if data['samples'] > 0 else 0
         
@@ -450,13 +766,25 @@ async def get_by_origin():
             "avg_altitude": round(avg_altitude, 2),
             "avg_velocity": round(avg_velocity, 2)
         }
-    return result
 
-@app.get("/api/v1/fleet/stats/by-aircraft-type")
-async def get_by_aircraft_type():
-    """Get statistics grouped by aircraft type."""
+    return orjson.dumps(result)
+
+@app.get("/api/v1/fleet/stats/by-origin")
+async def get_by_origin():
+    """Get statistics grouped by origin airport."""
+    cached = await _cache_get("fleet:cache:by-origin")
+    if cached is not None:
+        return _cached_json(cached)
+
+    payload = _build_by_origin(_stats_version)
+    await _cache_set("fleet:cache:by-origin", payload)
+    return _cached_json(payload)
+
+@lru_cache(maxsize=4)
+def _build_by_aircraft_type(version):
+    """Build the serialized by-aircraft-type response for one stats version."""
     result = {}
-    for aircraft_type, data in stats['by_aircraft_type'].items():
+    for aircraft_type, data in aircraft_type_stats.to_dict().items():
         avg_altitude = data['total_altitude'] / data['samples'] if data['samples'] > 0 else 0
         avg_velocity = data['total_velocity'] / data['samples'] if data['samples'] > 0 else 0
         
@@ -465,16 +793,46 @@ async def get_by_aircraft_type():
             "avg_altitude": round(avg_altitude, 2),
             "avg_velocity": round(avg_velocity, 2)
         }
-    return result
+
+    return orjson.dumps(result)
+
+@app.get("/api/v1/fleet/stats/by-aircraft-type")
+async def get_by_aircraft_type():
+    """Get statistics grouped by aircraft type."""
+    cached = await _cache_get("fleet:cache:by-aircraft-type")
+    if cached is not None:
+        return _cached_json(cached)
+
+    payload = _build_by_aircraft_type(_stats_version)
+    await _cache_set("fleet:cache:by-aircraft-type", payload)
+    return _cached_json(payload)
 
 @app.on_event("startup")
 async def startup():
     """Load statistics from state store on startup."""
-    print("🚀 Fleet Stats Service starting...")
+    global _redis
+    logger.info("Fleet Stats Service starting...")
+    try:
+        _redis = aioredis.from_url(REDIS_URL)
+    except Exception as e:
+        logger.warning("Response cache disabled (no Redis): %s", e)
     load_stats_from_state()
-    print(f"📊 Current stats: {stats['total_active']} total flights")
+    asyncio.create_task(_state_writer_loop())
+    asyncio.create_task(_log_summary_loop())
+    logger.info("Current stats: %d total flights", stats['total_active'])
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=PORT)
+    # uvloop + httptools replace the default asyncio loop and h11 parser.
+    # WORKERS defaults to 1 because the stats tables live in-process; scale
+    # it only once cross-worker state (e.g. the shared state store) is the
+    # source of truth.
+    uvicorn.run(
+        "app:app",
+        host="0.0.0.0",
+        port=PORT,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WORKERS", "1"))
+    )
 
@@ -3,28 +3,214 @@ Flight Archiver Service
 Subscribes to flight-update topic and archives all flight updates to local file storage using Dapr Output Binding.
 """
 
+import asyncio
 import os
-import json
 import logging
-import http.client
-from datetime import datetime
+import time
+import httpx
+import orjson
 from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Dapr configuration
 DAPR_HTTP_PORT = int(os.getenv("DAPR_HTTP_PORT", "3504"))
 BINDING_NAME = "filebinding"  # Name of the output binding component
 
+# Archive records are buffered and written as one NDJSON file per batch
+# instead of one file (and one Dapr round-trip) per message
+FLUSH_MAX_ITEMS = 100
+FLUSH_MAX_AGE_SECONDS = 0.5
+
+# Handlers ack immediately after enqueueing here; a small pool of worker
+# tasks drains the queue into the NDJSON buffer and issues the binding
+# calls, so Dapr delivery is decoupled from archive I/O. A full queue
+# signals backpressure and the handler falls back to archiving inline.
+QUEUE_MAX_ITEMS = 10_000
+DRAIN_WORKERS = 4
+
+# A failed flush puts its batch back at the front of the buffer so the
+# next flush retries it; the buffer is capped so a sidecar outage cannot
+# grow it without bound (oldest records are dropped past the cap)
+BUFFER_MAX_ITEMS = 10_000
+
+_QUEUE: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_MAX_ITEMS)
+
+_BUFFER: list[bytes] = []
+_LAST_FLUSH = time.monotonic()
+
+# Timestamps come from time.time_ns with the per-second strftime part
+# cached, so the hot path pays one divmod and an f-string per message
+# instead of two datetime allocations plus strftime
+_PREFIX_SECOND = 0
+_PREFIX = ""
+
+def _utc_timestamp():
+    """ISO-8601 UTC timestamp with millisecond precision."""
+    global _PREFIX_SECOND, _PREFIX
+    secs, ns = divmod(time.time_ns(), 1_000_000_000)
+    if secs != _PREFIX_SECOND:
+        _PREFIX = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(secs))
+        _PREFIX_SECOND = secs
+    return f"{_PREFIX}.{ns // 1_000_000:03d}Z"
+
+def _requeue_batch(lines: list[bytes]):
+    """Put a failed batch back at the front of the buffer, bounded."""
+    lines.extend(_BUFFER)
+    dropped = len(lines) - BUFFER_MAX_ITEMS
+    if dropped > 0:
+        # Shed the oldest records rather than growing without bound
+        del lines[:dropped]
+        logger.error(f"Archive buffer full, dropped {dropped} oldest records")
+    _BUFFER[:] = lines
+
+async def _flush_buffer():
+    """
+    Write all buffered records as a single NDJSON batch file. On failure
+    the batch is put back at the front of the buffer so the flush loop or
+    the next full batch retries it instead of losing the records.
+    """
+    global _LAST_FLUSH
+    if not _BUFFER:
+        _LAST_FLUSH = time.monotonic()
+        return
+
+    lines = _BUFFER[:]
+    _BUFFER.clear()
+    _LAST_FLUSH = time.monotonic()
+
+    secs, ns = divmod(time.time_ns(), 1_000_000_000)
+    timestamp_str = f"{time.strftime('%Y%m%d-%H%M%S', time.gmtime(secs))}-{ns // 1_000_000:03d}"
+    binding_request = {
+        "operation": "create",
+        "data": b"".join(lines).decode('utf-8'),
+        "metadata": {
+            "fileName": f"flights-batch-{timestamp_str}.ndjson"
+        }
+    }
+
+    try:
+        response = await app.state.dapr_http.post(
+            f"/v1.0/bindings/{BINDING_NAME}",
+            content=orjson.dumps(binding_request),
+            headers={"Content-Type": "application/json"}
+        )
+    except Exception:
+        _requeue_batch(lines)
+        raise
+
+    if response.status_code < 200 or response.status_code >= 300:
+        _requeue_batch(lines)
+        raise RuntimeError(f"HTTP {response.status_code}: {response.text}")
+
+    logger.info(f"Archived batch of {len(lines)} flight updates")
+
+async def _flush_loop():
+    """Flush on the timeout path so a quiet topic never strands records."""
+    while True:
+        await asyncio.sleep(FLUSH_MAX_AGE_SECONDS)
+        if _BUFFER and time.monotonic() - _LAST_FLUSH > FLUSH_MAX_AGE_SECONDS:
+            try:
+                await _flush_buffer()
+            except Exception as e:
+                logger.error(f"Error flushing archive batch: {e}")
+
+async def _drain_worker():
+    """Move queued records into the batch buffer and flush full batches."""
+    while True:
+        line = _QUEUE.get_nowait() if not _QUEUE.empty() else await _QUEUE.get()
+        _BUFFER.append(line)
+        # Opportunistically take whatever else is already queued, up to
+        # one batch, before paying for a flush
+        while len(_BUFFER) < FLUSH_MAX_ITEMS and not _QUEUE.empty():
+            _BUFFER.append(_QUEUE.get_nowait())
+        if len(_BUFFER) >= FLUSH_MAX_ITEMS:
+            try:
+                await _flush_buffer()
+            except Exception as e:
+                logger.error(f"Error flushing archive batch: {e}")
+
+@app.on_event("startup")
+async def startup():
+    """Open a keep-alive HTTP client to the Dapr sidecar."""
+    app.state.dapr_http = httpx.AsyncClient(
+        base_url=f"http://127.0.0.1:{DAPR_HTTP_PORT}",
+        timeout=5.0,
+        limits=httpx.Limits(max_keepalive_connections=32)
+    )
+    asyncio.create_task(_flush_loop())
+    for _ in range(DRAIN_WORKERS):
+        asyncio.create_task(_drain_worker())
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Flush any queued and buffered records, then close the HTTP client."""
+    try:
+        while not _QUEUE.empty():
+            _BUFFER.append(_QUEUE.get_nowait())
+        await _flush_buffer()
+    except Exception as e:
+        logger.error(f"Error flushing archive batch on shutdown: {e}")
+    await app.state.dapr_http.aclose()
+
 @app.get("/health")
 async def health():
     """Health check endpoint"""
     return {"status": "healthy", "service": "flight-archiver"}
 
+def extract_flight_raw(body):
+    """
+    Extract flight data from a CloudEvents envelope (or direct JSON) as
+    raw JSON bytes. A JSON-string data field is spliced through without a
+    decode/re-encode round-trip; embedded objects are serialized once.
+    Returns None when the message carries no payload.
+    """
+    if 'data' in body:
+        # CloudEvents format - data is a JSON string or an embedded object
+        data = body['data']
+        if isinstance(data, str):
+            stripped = data.strip()
+            if stripped.startswith('{'):
+                # Already-serialized flight JSON: pass the bytes through
+                return stripped.encode('utf-8')
+            # Not a JSON object; archive it as a JSON string as before
+            return orjson.dumps(data)
+        if data is None:
+            return None
+        return orjson.dumps(data)
+    # Direct JSON format
+    return orjson.dumps(body) if body else None
+
+def _archive_line(flight_raw):
+    """Frame raw flight JSON bytes as a timestamped NDJSON line."""
+    return (b'{"timestamp":"' + _utc_timestamp().encode('utf-8')
+            + b'","flight":' + flight_raw + b'}\n')
+
+def queue_flight(flight_raw):
+    """
+    Queue one flight update for archiving and return immediately. Raises
+    asyncio.QueueFull when the drain workers are saturated.
+    """
+    _QUEUE.put_nowait(_archive_line(flight_raw))
+
+async def archive_flight(flight_raw):
+    """
+    Archive one flight update inline, bypassing the queue. Records still
+    accumulate as NDJSON lines and are written through the Dapr Output
+    Binding in batches, amortizing the binding round-trip and filesystem
+    create across up to FLUSH_MAX_ITEMS messages. Raises on binding
+    failure during a flush.
+    """
+    _BUFFER.append(_archive_line(flight_raw))
+
+    if len(_BUFFER) >= FLUSH_MAX_ITEMS or time.monotonic() - _LAST_FLUSH > FLUSH_MAX_AGE_SECONDS:
+        await _flush_buffer()
+
 @app.post("/flight-update")
 async def flight_update_handler(request: Request):
     """
@@ -32,81 +218,74 @@ async def flight_update_handler(request: Request):
     Archives each flight update to local file storage using Dapr Output Binding.
     """
     try:
-        body = await request.json()
-        
-        # Extract flight data from CloudEvents format
-        flight_data = None
+        raw = await request.body()
+        body = orjson.loads(raw)
+
         if 'data' in body:
-            # CloudEvents format - data is base64 encoded or JSON string
-            data = body['data']
-            if isinstance(data, str):
-                try:
-                    flight_data = json.loads(data)
-                except json.JSONDecodeError:
-                    # If not JSON, try to parse as-is
-                    flight_data = data
-            else:
-                flight_data = data
+            flight_raw = extract_flight_raw(body)
         else:
-            # Direct JSON format
-            flight_data = body
-        
-        if not flight_data:
+            # Direct JSON format: the request body already is the flight,
+            # so those bytes go straight through
+            flight_raw = raw if body else None
+
+        if not flight_raw:
             logger.warning("No flight data found in message")
             return {"status": "error", "message": "No flight data found"}
-        
-        # Add timestamp to flight data for archiving
-        archive_record = {
-            "timestamp": datetime.utcnow().isoformat() + "Z",
-            "flight": flight_data
-        }
-        
-        # Use Dapr Output Binding to write to file storage via HTTP API
-        # Format: POST http://localhost:<DAPR_HTTP_PORT>/v1.0/bindings/<binding_name>
+
         try:
-            # Invoke output binding using HTTP API directly
-            timestamp_str = datetime.utcnow().strftime('%Y%m%d-%H%M%S-%f')[:-3]  # Include milliseconds
-            file_name = f"flight-{flight_data.get('icao24', 'unknown')}-{timestamp_str}.json"
-            
-            # Prepare binding request
-            binding_request = {
-                "operation": "create",
-                "data": json.dumps(archive_record),
-                "metadata": {
-                    "fileName": file_name
-                }
-            }
-            
-            # Call Dapr HTTP API for bindings
-            conn = http.client.HTTPConnection("127.0.0.1", DAPR_HTTP_PORT, timeout=5)
+            queue_flight(flight_raw)
+            return {"status": "success", "queued": True}
+        except asyncio.QueueFull:
+            # Backpressure: archive inline so Dapr redelivery throttles the
+            # producer instead of the queue growing without bound
             try:
-                conn.request(
-                    "POST",
-                    f"/v1.0/bindings/{BINDING_NAME}",
-                    json.dumps(binding_request),
-                    {"Content-Type": "application/json"}
-                )
-                response = conn.getresponse()
-                response_data = response.read().decode('utf-8')
-                
-                if response.status >= 200 and response.status < 300:
-                    logger.info(f"Archived flight update: {flight_data.get('callsign', 'unknown')} ({flight_data.get('icao24', 'unknown')})")
-                    return {"status": "success", "archived": True}
-                else:
-                    logger.error(f"Binding API returned status {response.status}: {response_data}")
-                    return {"status": "error", "message": f"HTTP {response.status}: {response_data}"}
-            finally:
-                conn.close()
-            
-        except Exception as binding_error:
-            logger.error(f"Error writing to binding: {binding_error}")
-            return {"status": "error", "message": str(binding_error)}
-            
+                await archive_flight(flight_raw)
+                return {"status": "success", "archived": True}
+            except Exception as binding_error:
+                logger.error(f"Error writing to binding: {binding_error}")
+                return {"status": "error", "message": str(binding_error)}
+
     except Exception as e:
         logger.error(f"Error processing flight update: {e}")
         return {"status": "error", "message": str(e)}
 
+@app.post("/flight-update-bulk")
+async def flight_update_bulk_handler(request: Request):
+    """
+    Handle batched flight update messages from Dapr's bulk subscribe API.
+    One POST delivers up to maxMessagesCount CloudEvents, amortizing the
+    HTTP round-trip across the whole batch.
+    """
+    body = orjson.loads(await request.body())
+
+    statuses = []
+    for entry in body.get('entries', []):
+        entry_id = entry.get('entryId')
+        try:
+            flight_raw = extract_flight_raw(entry.get('event', {}))
+            if flight_raw:
+                try:
+                    queue_flight(flight_raw)
+                except asyncio.QueueFull:
+                    await archive_flight(flight_raw)
+            statuses.append({"entryId": entry_id, "status": "SUCCESS"})
+        except Exception as e:
+            logger.error(f"Error processing bulk entry {entry_id}: {e}")
+            statuses.append({"entryId": entry_id, "status": "RETRY"})
+
+    return {"statuses": statuses}
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=3004)
+    # uvloop + httptools replace the default asyncio loop and h11 parser.
+    # WORKERS defaults to 1 because the NDJSON batch buffer lives
+    # in-process.
+    uvicorn.run(
+        "app:app",
+        host="0.0.0.0",
+        port=3004,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WORKERS", "1"))
+    )
 